@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Benchmark de contenção do mapa de atendimentos com 64 threads.
+
+Compara o MapaConcorrente (travas particionadas) com um dicionário protegido
+por uma única trava global, executando a mesma mistura de operações:
+inserção, leitura e transição de status (Pendente -> Registrado).
+"""
+
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.models.atendimento import MapaConcorrente
+
+NUM_THREADS = 64
+OPERACOES_POR_THREAD = 5000
+
+
+class MapaTravaGlobal(MapaConcorrente):
+    """Referência: o mesmo mapa com uma única partição (uma trava global)."""
+
+    def __init__(self):
+        super().__init__(num_particoes=1)
+
+
+def executar_carga(mapa, id_thread, barreira):
+    barreira.wait()
+    for i in range(OPERACOES_POR_THREAD):
+        chave = f"CORR{id_thread:03d}{i:06d}"
+        mapa.inserir(chave, {'status': 'Pendente', 'data_inicio': ''})
+        mapa.obter(chave)
+        if not mapa.transicionar_status(chave, 'Pendente', 'Registrado', codigo_interno=i):
+            raise RuntimeError(f"Transição inesperadamente recusada para {chave}")
+
+
+def medir(nome, mapa):
+    barreira = threading.Barrier(NUM_THREADS + 1)
+    threads = [
+        threading.Thread(target=executar_carga, args=(mapa, n, barreira))
+        for n in range(NUM_THREADS)
+    ]
+    for thread in threads:
+        thread.start()
+
+    inicio = time.perf_counter()
+    barreira.wait()
+    for thread in threads:
+        thread.join()
+    duracao = time.perf_counter() - inicio
+
+    total_operacoes = NUM_THREADS * OPERACOES_POR_THREAD * 3
+    registrados = mapa.contar(lambda a: a['status'] == 'Registrado')
+    assert registrados == NUM_THREADS * OPERACOES_POR_THREAD, registrados
+
+    print(f"{nome:<28} {duracao:8.3f}s  {total_operacoes / duracao:12,.0f} ops/s")
+
+
+def main():
+    print(f"Threads: {NUM_THREADS} | Operações por thread: {OPERACOES_POR_THREAD * 3}")
+    medir("Trava global", MapaTravaGlobal())
+    medir("Travas particionadas (64)", MapaConcorrente(num_particoes=64))
+
+
+if __name__ == "__main__":
+    main()
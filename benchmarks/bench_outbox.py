@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Benchmark do outbox persistente dos Correios.
+
+Mede a vazão de `registrar` (gravação durável com fsync) com várias threads
+submetendo envios ao mesmo tempo, e quantos envios cada fsync agrupou.
+A entrega é substituída por uma função vazia.
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.models import outbox
+from src.models.outbox import OutboxCorreios
+
+ENVIOS_POR_THREAD = 200
+
+DADOS_EXEMPLO = {
+    'codigoCorreios': 'COR123',
+    'valorServico': '15075',
+    'numeroIdentificacaoCliente': '12345678909',
+    'quantidade': '1',
+    'chaveCliente': 'ASL-BOL001',
+    'textoTicket': 'Texto adicional no ticket'
+}
+
+
+def contar_fsyncs():
+    """Substitui os.fsync no módulo do outbox por uma versão que conta chamadas."""
+    contador = {'total': 0}
+    fsync_original = os.fsync
+
+    def fsync_contado(fd):
+        contador['total'] += 1
+        fsync_original(fd)
+
+    outbox.os.fsync = fsync_contado
+    return contador, lambda: setattr(outbox.os, 'fsync', fsync_original)
+
+
+def medir(num_threads, diretorio):
+    caminho = os.path.join(diretorio, f'outbox_{num_threads}.jsonl')
+    fila = OutboxCorreios(caminho)
+    fila.iniciar(lambda dados, chave: None)
+
+    contador, restaurar = contar_fsyncs()
+    barreira = threading.Barrier(num_threads + 1)
+
+    def submeter(id_thread):
+        barreira.wait()
+        for i in range(ENVIOS_POR_THREAD):
+            fila.registrar(f"CORR{id_thread:03d}{i:06d}", DADOS_EXEMPLO)
+
+    threads = [threading.Thread(target=submeter, args=(n,)) for n in range(num_threads)]
+    for thread in threads:
+        thread.start()
+
+    inicio = time.perf_counter()
+    barreira.wait()
+    for thread in threads:
+        thread.join()
+    duracao = time.perf_counter() - inicio
+    restaurar()
+
+    total = num_threads * ENVIOS_POR_THREAD
+    por_fsync = total / max(contador['total'], 1)
+    print(f"{num_threads:>3} threads  {duracao:8.3f}s  {total / duracao:10,.0f} envios/s  "
+          f"{por_fsync:6.1f} gravações por fsync")
+
+
+def main():
+    with tempfile.TemporaryDirectory() as diretorio:
+        for num_threads in (1, 8, 64):
+            medir(num_threads, diretorio)
+
+
+if __name__ == "__main__":
+    main()
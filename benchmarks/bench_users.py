@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Benchmark da listagem de usuários (/api/users) com 1 milhão de registros.
+
+Usa um banco SQLite temporário (o app.db da aplicação não é tocado) e compara:
+- a listagem antiga, com hidratação ORM de todos os usuários;
+- a busca de uma página por keyset (início e fim da tabela);
+- o modo streaming, que percorre a tabela inteira em blocos.
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask, jsonify
+from src.models.user import User, db
+from src.routes.user import user_bp
+
+TOTAL_USUARIOS = 1_000_000
+TAMANHO_PAGINA = 100
+
+
+def popular_banco(caminho):
+    conexao = sqlite3.connect(caminho)
+    conexao.executemany(
+        'INSERT INTO user (id, username, email) VALUES (?, ?, ?)',
+        ((i, f'operador{i}', f'operador{i}@example.com') for i in range(1, TOTAL_USUARIOS + 1))
+    )
+    conexao.commit()
+    conexao.close()
+
+
+def criar_app(caminho):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{caminho}'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['USERS_PAGE_SIZE'] = TAMANHO_PAGINA
+    app.register_blueprint(user_bp, url_prefix='/api')
+
+    @app.route('/api/users-orm')
+    def listar_orm():
+        # Implementação anterior, mantida aqui apenas como referência
+        return jsonify([user.to_dict() for user in User.query.all()])
+
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def medir(nome, funcao):
+    inicio = time.perf_counter()
+    tamanho = funcao()
+    duracao = time.perf_counter() - inicio
+    print(f"{nome:<34} {duracao:9.4f}s  {tamanho / 1024:12,.0f} KiB")
+
+
+def main():
+    with tempfile.TemporaryDirectory() as diretorio:
+        caminho = os.path.join(diretorio, 'bench.db')
+        app = criar_app(caminho)
+        print(f"Populando {TOTAL_USUARIOS:,} usuários...")
+        popular_banco(caminho)
+
+        cliente = app.test_client()
+
+        medir("ORM completo (anterior)", lambda: len(cliente.get('/api/users-orm').data))
+        medir("Página keyset (início)", lambda: len(cliente.get(f'/api/users?limit={TAMANHO_PAGINA}').data))
+        medir(
+            "Página keyset (fim da tabela)",
+            lambda: len(cliente.get(f'/api/users?limit={TAMANHO_PAGINA}&after_id={TOTAL_USUARIOS - 50}').data)
+        )
+
+        def consumir_stream():
+            resposta = cliente.get('/api/users', buffered=False)
+            tamanho = sum(len(bloco) for bloco in resposta.response)
+            resposta.close()
+            return tamanho
+
+        medir("Streaming completo", consumir_stream)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,10 +3,11 @@ import sys
 # DON'T CHANGE THIS !!!
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
-from flask import Flask, send_from_directory
+from flask import Flask
 from src.models.user import db
 from src.routes.user import user_bp
-from src.routes.boletos import boletos_bp
+from src.routes.boletos import boletos_bp, iniciar_outbox_correios
+from src.static_assets import ManifestoEstatico
 
 app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
 app.config['SECRET_KEY'] = 'asdf#FGSgvasgf$5$WGT'
@@ -17,25 +18,30 @@ app.register_blueprint(boletos_bp, url_prefix='/api')
 # uncomment if you need to use database
 app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# default and maximum page size for GET /api/users
+app.config['USERS_PAGE_SIZE'] = 100
+app.config['USERS_MAX_PAGE_SIZE'] = 1000
 db.init_app(app)
 with app.app_context():
     db.create_all()
 
+# Started on the first request so the outbox (and its delivery threads) lives
+# only in a process that serves requests: not in the debug reloader's monitor
+# nor in a gunicorn --preload master, whose threads would not survive the fork.
+@app.before_request
+def start_correios_outbox():
+    iniciar_outbox_correios()
+
+# in-memory, precompressed copy of the static folder
+static_manifest = ManifestoEstatico(app.static_folder) if app.static_folder else None
+
 @app.route('/', defaults={'path': ''})
 @app.route('/<path:path>')
 def serve(path):
-    static_folder_path = app.static_folder
-    if static_folder_path is None:
+    if static_manifest is None:
             return "Static folder not configured", 404
 
-    if path != "" and os.path.exists(os.path.join(static_folder_path, path)):
-        return send_from_directory(static_folder_path, path)
-    else:
-        index_path = os.path.join(static_folder_path, 'index.html')
-        if os.path.exists(index_path):
-            return send_from_directory(static_folder_path, 'index.html')
-        else:
-            return "index.html not found", 404
+    return static_manifest.servir(path)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,103 @@
+import threading
+
+
+class MapaConcorrente:
+    """Mapa em memória seguro para uso entre threads, com travas particionadas.
+
+    As chaves são distribuídas entre várias partições, cada uma com sua
+    própria trava, de modo que threads operando sobre chaves diferentes
+    raramente disputam a mesma trava. Os valores são dicionários; as leituras
+    devolvem cópias para que ninguém observe um registro sendo alterado.
+    """
+
+    def __init__(self, num_particoes=64):
+        self._num_particoes = num_particoes
+        self._dados = [{} for _ in range(num_particoes)]
+        self._travas = [threading.Lock() for _ in range(num_particoes)]
+
+    def _indice(self, chave):
+        return hash(chave) % self._num_particoes
+
+    def __contains__(self, chave):
+        i = self._indice(chave)
+        with self._travas[i]:
+            return chave in self._dados[i]
+
+    def __len__(self):
+        total = 0
+        for i in range(self._num_particoes):
+            with self._travas[i]:
+                total += len(self._dados[i])
+        return total
+
+    def obter(self, chave):
+        """Retorna uma cópia do registro, ou None se a chave não existir."""
+        i = self._indice(chave)
+        with self._travas[i]:
+            registro = self._dados[i].get(chave)
+            return dict(registro) if registro is not None else None
+
+    def inserir(self, chave, registro):
+        """Insere (ou substitui) o registro associado à chave."""
+        i = self._indice(chave)
+        with self._travas[i]:
+            self._dados[i][chave] = dict(registro)
+
+    def atualizar(self, chave, **campos):
+        """Atualiza os campos do registro de uma só vez. Retorna False se a chave não existir."""
+        i = self._indice(chave)
+        with self._travas[i]:
+            registro = self._dados[i].get(chave)
+            if registro is None:
+                return False
+            registro.update(campos)
+            return True
+
+    def comparar_e_definir(self, chave, campo, esperado, novo, **campos):
+        """Define `campo` como `novo` apenas se o valor atual for `esperado`.
+
+        Os demais campos informados são gravados na mesma operação atômica.
+        Retorna True se a troca foi feita.
+        """
+        i = self._indice(chave)
+        with self._travas[i]:
+            registro = self._dados[i].get(chave)
+            if registro is None or registro.get(campo) != esperado:
+                return False
+            registro[campo] = novo
+            registro.update(campos)
+            return True
+
+    def transicionar_status(self, chave, status_esperado, novo_status, **campos):
+        """Muda o status do registro de `status_esperado` para `novo_status` atomicamente."""
+        return self.comparar_e_definir(chave, 'status', status_esperado, novo_status, **campos)
+
+    def itens(self):
+        """Retorna um retrato (lista de pares chave/cópia) de todos os registros."""
+        itens = []
+        for i in range(self._num_particoes):
+            with self._travas[i]:
+                itens.extend((chave, dict(registro)) for chave, registro in self._dados[i].items())
+        return itens
+
+    def atualizar_onde(self, predicado, **campos):
+        """Atualiza o primeiro registro que satisfaz o predicado, sob a trava da sua partição.
+
+        A verificação do predicado e a atualização são atômicas. Retorna a
+        chave atualizada, ou None se nenhum registro satisfizer o predicado.
+        """
+        for i in range(self._num_particoes):
+            with self._travas[i]:
+                for chave, registro in self._dados[i].items():
+                    if predicado(registro):
+                        registro.update(campos)
+                        return chave
+        return None
+
+    def contar(self, predicado):
+        """Conta os registros que satisfazem o predicado."""
+        total = 0
+        for i in range(self._num_particoes):
+            with self._travas[i]:
+                total += sum(1 for registro in self._dados[i].values() if predicado(registro))
+        return total
@@ -0,0 +1,243 @@
+import fcntl
+import json
+import os
+import queue
+import threading
+import uuid
+from datetime import datetime
+
+# Tamanho a partir do qual o arquivo é truncado quando não há envios em aberto
+LIMITE_COMPACTACAO = 16 * 1024 * 1024
+
+# Tempo máximo (segundos) que `registrar` espera pelo fsync do envio
+TEMPO_MAXIMO_GRAVACAO = 10
+
+
+class OutboxCorreios:
+    """Fila persistente (append-only) de envios para a API dos Correios.
+
+    Cada envio é gravado em um arquivo JSON Lines e sincronizado em disco
+    (fsync) antes de `registrar` retornar. As gravações de várias threads são
+    agrupadas em um único fsync (group commit) por uma thread dedicada. Threads
+    entregadoras consomem a fila e, após cada tentativa de entrega, gravam um
+    marcador de conclusão. Na inicialização, envios sem marcador de conclusão
+    são recuperados e reenviados.
+
+    A entrega é "pelo menos uma vez": um envio pode ser repetido se o processo
+    cair entre a entrega e a gravação do marcador. O arquivo pertence a um
+    único processo por vez, garantido por uma trava exclusiva (flock) em um
+    arquivo `.lock` ao lado dele; nos demais processos o outbox fica
+    indisponível e `registrar` levanta OSError.
+    """
+
+    def __init__(self, caminho, num_entregadores=8):
+        self._caminho = caminho
+        self._num_entregadores = num_entregadores
+        self._trava = threading.Lock()
+        self._ha_linhas = threading.Condition(self._trava)
+        self._gravado = threading.Condition(self._trava)
+        self._buffer = []  # (linha, espera) aguardando fsync
+        self._em_aberto = 0  # envios registrados ainda sem marcador de conclusão
+        self._fila = queue.Queue()
+        self._arquivo = None
+        self._tamanho_duravel = 0  # tamanho do arquivo após o último fsync bem-sucedido
+        self._arquivo_trava = None
+        self._entregar = None
+        self._iniciado = False
+        self._trava_inicio = threading.Lock()
+
+    def iniciar(self, entregar, ao_recuperar=None):
+        """Recupera os envios pendentes e inicia as threads de gravação e entrega.
+
+        `entregar(dados, chave)` é chamado para cada envio. `ao_recuperar(chave,
+        dados, data_registro)`, se informado, é chamado para cada envio
+        recuperado do disco antes de ele voltar à fila.
+
+        Chamadas repetidas não têm efeito. Se outro processo já detém o
+        outbox, nada é recuperado nem iniciado neste processo.
+        """
+        if self._iniciado:
+            return
+        with self._trava_inicio:
+            if self._iniciado:
+                return
+            self._iniciado = True
+
+            arquivo_trava = open(f"{self._caminho}.lock", 'a')
+            try:
+                fcntl.flock(arquivo_trava.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                arquivo_trava.close()
+                print(f"ERRO: outbox dos Correios {self._caminho} já está em uso por outro processo; "
+                      f"envios não serão aceitos neste processo (pid {os.getpid()})")
+                return
+            self._arquivo_trava = arquivo_trava
+
+            self._iniciar_com_trava(entregar, ao_recuperar)
+
+    def _iniciar_com_trava(self, entregar, ao_recuperar):
+        self._entregar = entregar
+        pendentes = self._recuperar()
+
+        # Sem buffer do Python: após uma falha, nenhum byte pendente é regravado depois
+        self._arquivo = open(self._caminho, 'ab', buffering=0)
+        self._tamanho_duravel = os.fstat(self._arquivo.fileno()).st_size
+        self._em_aberto = len(pendentes)
+
+        threading.Thread(target=self._gravar_continuamente, daemon=True).start()
+        for _ in range(self._num_entregadores):
+            threading.Thread(target=self._entregar_continuamente, daemon=True).start()
+
+        for entrada in pendentes:
+            if ao_recuperar is not None:
+                ao_recuperar(entrada['chave'], entrada['dados'], entrada['data_registro'])
+            self._fila.put(entrada)
+
+        if pendentes:
+            print(f"Outbox dos Correios: {len(pendentes)} envio(s) pendente(s) recuperado(s)")
+
+    def registrar(self, chave, dados):
+        """Grava o envio de forma durável e o coloca na fila de entrega.
+
+        Só retorna depois do fsync; levanta OSError se a gravação falhar ou
+        se o outbox não tiver sido iniciado neste processo.
+        """
+        if self._arquivo is None:
+            raise OSError("Outbox dos Correios não iniciado neste processo")
+        entrada = {
+            'tipo': 'envio',
+            'id': uuid.uuid4().hex,
+            'chave': chave,
+            'dados': dados,
+            'data_registro': datetime.now().isoformat()
+        }
+        self._anexar(entrada, aguardar=True, envio=True)
+        self._fila.put(entrada)
+
+    def _anexar(self, entrada, aguardar, envio=False):
+        linha = (json.dumps(entrada, ensure_ascii=False, default=str) + '\n').encode('utf-8')
+        espera = {'concluido': False, 'erro': None, 'abandonado': False, 'id': entrada['id']}
+
+        with self._trava:
+            self._buffer.append((linha, espera))
+            if envio:
+                self._em_aberto += 1
+            self._ha_linhas.notify()
+
+            if not aguardar:
+                return
+            if not self._gravado.wait_for(lambda: espera['concluido'], timeout=TEMPO_MAXIMO_GRAVACAO):
+                # Desiste do envio: se ainda não foi gravado, sai do buffer; se
+                # a gravação já está em curso, ele é marcado como concluído ao final
+                if (linha, espera) in self._buffer:
+                    self._buffer.remove((linha, espera))
+                else:
+                    espera['abandonado'] = True
+                self._em_aberto -= 1
+                raise OSError(f"Tempo esgotado aguardando a gravação do outbox ({TEMPO_MAXIMO_GRAVACAO}s)")
+
+            if espera['erro'] is not None:
+                self._em_aberto -= 1
+                raise espera['erro']
+
+    def _gravar_continuamente(self):
+        """Grava o buffer acumulado com um único fsync por lote (group commit)."""
+        while True:
+            with self._trava:
+                while not self._buffer:
+                    self._ha_linhas.wait()
+                lote, self._buffer = self._buffer, []
+
+            erro = None
+            dados = memoryview(b''.join(linha for linha, _ in lote))
+            try:
+                escritos = 0
+                while escritos < len(dados):
+                    escritos += self._arquivo.write(dados[escritos:])
+                os.fsync(self._arquivo.fileno())
+                self._tamanho_duravel += len(dados)
+            except OSError as e:
+                print(f"Erro ao gravar outbox dos Correios: {e}")
+                erro = e
+                self._descartar_gravacao_parcial()
+
+            with self._trava:
+                for _, espera in lote:
+                    espera['concluido'] = True
+                    espera['erro'] = erro
+                    if espera['abandonado'] and erro is None:
+                        # A requisição já respondeu com erro; o envio não deve ser reenviado
+                        marcador = {'tipo': 'concluido', 'id': espera['id']}
+                        self._buffer.append(((json.dumps(marcador) + '\n').encode('utf-8'), {
+                            'concluido': False, 'erro': None, 'abandonado': False, 'id': None
+                        }))
+                self._gravado.notify_all()
+
+                # Sem envios em aberto, todo o conteúdo do arquivo já foi entregue
+                if erro is None and self._em_aberto == 0 and not self._buffer:
+                    self._compactar_se_necessario()
+
+    def _descartar_gravacao_parcial(self):
+        """Volta o arquivo ao último tamanho sincronizado após um lote que falhou.
+
+        Sem isso, uma linha parcial ficaria colada à próxima (e a entrada válida
+        seria descartada na recuperação), ou um envio já respondido com erro
+        poderia chegar ao disco e ser reenviado.
+        """
+        try:
+            self._arquivo.truncate(self._tamanho_duravel)
+            os.fsync(self._arquivo.fileno())
+        except OSError as e:
+            print(f"Erro ao descartar gravação parcial do outbox dos Correios: {e}")
+
+    def _compactar_se_necessario(self):
+        try:
+            if self._tamanho_duravel >= LIMITE_COMPACTACAO:
+                self._arquivo.truncate(0)
+                os.fsync(self._arquivo.fileno())
+                self._tamanho_duravel = 0
+        except OSError as e:
+            print(f"Erro ao compactar outbox dos Correios: {e}")
+
+    def _entregar_continuamente(self):
+        while True:
+            entrada = self._fila.get()
+            try:
+                self._entregar(entrada['dados'], entrada['chave'])
+            except Exception as e:
+                print(f"Erro na entrega do envio {entrada['id']} do outbox: {e}")
+
+            with self._trava:
+                self._em_aberto -= 1
+            self._anexar({'tipo': 'concluido', 'id': entrada['id']}, aguardar=False)
+
+    def _recuperar(self):
+        """Lê o arquivo, descarta envios concluídos e o reescreve só com os pendentes."""
+        if not os.path.exists(self._caminho):
+            return []
+
+        envios = {}
+        with open(self._caminho, 'rb') as arquivo:
+            for numero, linha in enumerate(arquivo, start=1):
+                try:
+                    entrada = json.loads(linha)
+                except ValueError:
+                    # Linha incompleta de uma gravação interrompida
+                    print(f"Outbox dos Correios: linha {numero} inválida ignorada")
+                    continue
+                if entrada.get('tipo') == 'envio':
+                    envios[entrada['id']] = entrada
+                elif entrada.get('tipo') == 'concluido':
+                    envios.pop(entrada['id'], None)
+
+        pendentes = list(envios.values())
+
+        caminho_temporario = f"{self._caminho}.tmp"
+        with open(caminho_temporario, 'wb') as arquivo:
+            for entrada in pendentes:
+                arquivo.write((json.dumps(entrada, ensure_ascii=False) + '\n').encode('utf-8'))
+            arquivo.flush()
+            os.fsync(arquivo.fileno())
+        os.replace(caminho_temporario, self._caminho)
+
+        return pendentes
@@ -3,22 +3,33 @@ import base64
 import pandas as pd
 import os
 import requests
-import threading
 import time
 import uuid
 from datetime import datetime
+from src.models.atendimento import MapaConcorrente
+from src.models.outbox import OutboxCorreios
 
 boletos_bp = Blueprint('boletos', __name__)
 
 # Variáveis globais para armazenar os dados dos boletos e códigos iniciais
 dados_boletos = None
-codigos_iniciais = {}  # Armazena códigos iniciais por sessão
-atendimentos_pendentes = {}  # Armazena atendimentos com status pendente
+codigos_iniciais = MapaConcorrente()  # Armazena códigos iniciais por sessão
+atendimentos_pendentes = MapaConcorrente()  # Armazena atendimentos com status pendente
 
 # URL do API dos Correios
 # URL da API dos Correios (será fornecida pelos Correios em produção)
 CORREIOS_API_URL = os.getenv("CORREIOS_API_URL", "https://apphom.correios.com.br/ster/api/v1/atendimentos/registra")
 
+# Outbox persistente dos envios aos Correios (sobrevive a reinícios do servidor)
+CORREIOS_OUTBOX_PATH = os.getenv(
+    "CORREIOS_OUTBOX_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), 'database', 'outbox_correios.jsonl')
+)
+# Número de entregas simultâneas aos Correios; cada uma pode levar até ~31s
+# (1s de espera + 30s de timeout), então aumente se a API estiver lenta
+CORREIOS_OUTBOX_ENTREGADORES = int(os.getenv("CORREIOS_OUTBOX_ENTREGADORES", "8"))
+outbox_correios = OutboxCorreios(CORREIOS_OUTBOX_PATH, num_entregadores=CORREIOS_OUTBOX_ENTREGADORES)
+
 def carregar_dados_boletos():
     """Carrega os dados da planilha Excel em memória."""
     global dados_boletos
@@ -86,38 +97,52 @@ def processar_atendimento_assincrono(dados_atendimento, codigo_inicial):
                 codigo_interno = resultado.get('codigo') or resultado.get('codigoInterno') or 'N/A'
                 
                 # Atualizar status do atendimento para "Registrado"
-                if codigo_inicial in atendimentos_pendentes:
-                    atendimentos_pendentes[codigo_inicial]['status'] = 'Registrado'
-                    atendimentos_pendentes[codigo_inicial]['codigo_interno'] = codigo_interno
-                    atendimentos_pendentes[codigo_inicial]['data_registro'] = datetime.now().isoformat()
-                    atendimentos_pendentes[codigo_inicial]['resposta_correios'] = resultado
+                atendimentos_pendentes.transicionar_status(
+                    codigo_inicial, 'Pendente', 'Registrado',
+                    codigo_interno=codigo_interno,
+                    data_registro=datetime.now().isoformat(),
+                    resposta_correios=resultado
+                )
                 
                 print(f"Atendimento registrado com sucesso. Código interno: {codigo_interno}")
             except ValueError as e:
                 # Resposta não é JSON válido
                 print(f"Resposta não é JSON válido: {response.text}")
-                if codigo_inicial in atendimentos_pendentes:
-                    atendimentos_pendentes[codigo_inicial]['status'] = 'Erro'
-                    atendimentos_pendentes[codigo_inicial]['erro'] = f"Resposta inválida: {response.text}"
+                atendimentos_pendentes.transicionar_status(
+                    codigo_inicial, 'Pendente', 'Erro',
+                    erro=f"Resposta inválida: {response.text}"
+                )
         else:
             # Tratar erros HTTP
             erro_msg = f"Erro HTTP {response.status_code}: {response.text}"
             print(erro_msg)
-            if codigo_inicial in atendimentos_pendentes:
-                atendimentos_pendentes[codigo_inicial]['status'] = 'Erro'
-                atendimentos_pendentes[codigo_inicial]['erro'] = erro_msg
+            atendimentos_pendentes.transicionar_status(codigo_inicial, 'Pendente', 'Erro', erro=erro_msg)
             raise Exception(erro_msg)
         
     except requests.exceptions.RequestException as e:
         print(f"Erro de conexão com o API dos Correios: {e}")
-        if codigo_inicial in atendimentos_pendentes:
-            atendimentos_pendentes[codigo_inicial]['status'] = 'Erro'
-            atendimentos_pendentes[codigo_inicial]['erro'] = f"Erro de conexão: {str(e)}"
+        atendimentos_pendentes.transicionar_status(
+            codigo_inicial, 'Pendente', 'Erro',
+            erro=f"Erro de conexão: {str(e)}"
+        )
     except Exception as e:
         print(f"Erro no processamento assíncrono: {e}")
-        if codigo_inicial in atendimentos_pendentes:
-            atendimentos_pendentes[codigo_inicial]['status'] = 'Erro'
-            atendimentos_pendentes[codigo_inicial]['erro'] = str(e)
+        atendimentos_pendentes.transicionar_status(codigo_inicial, 'Pendente', 'Erro', erro=str(e))
+
+def restaurar_atendimento_pendente(codigo_inicial, dados_atendimento, data_registro):
+    """Recria em memória o atendimento de um envio recuperado do outbox."""
+    atendimentos_pendentes.inserir(codigo_inicial, {
+        'json_enviado': dados_atendimento,
+        'status': 'Pendente',
+        'data_inicio': data_registro
+    })
+
+def iniciar_outbox_correios():
+    """Reenvia os atendimentos pendentes do outbox e inicia as threads de entrega."""
+    outbox_correios.iniciar(
+        processar_atendimento_assincrono,
+        ao_recuperar=restaurar_atendimento_pendente
+    )
 
 @boletos_bp.route('/boletos/gerar-codigo-inicial', methods=['POST'])
 def gerar_codigo_inicial_endpoint():
@@ -126,11 +151,11 @@ def gerar_codigo_inicial_endpoint():
         codigo_inicial = gerar_codigo_inicial()
         
         # Armazenar o código inicial (em um ambiente real, seria em um banco de dados)
-        codigos_iniciais[codigo_inicial] = {
+        codigos_iniciais.inserir(codigo_inicial, {
             'codigo': codigo_inicial,
             'data_geracao': datetime.now().isoformat(),
             'usado': False
-        }
+        })
         
         return jsonify({
             'sucesso': True,
@@ -251,23 +276,25 @@ def iniciar_atendimento():
         }
         
         # Criar registro de atendimento pendente
-        atendimentos_pendentes[codigo_inicial] = {
+        atendimentos_pendentes.inserir(codigo_inicial, {
             'json_enviado': json_atendimento,
             'status': 'Pendente',
             'data_inicio': datetime.now().isoformat(),
             'boleto_info': boleto_info
-        }
+        })
         
         # Marcar código inicial como usado
-        codigos_iniciais[codigo_inicial]['usado'] = True
+        codigos_iniciais.atualizar(codigo_inicial, usado=True)
         
-        # Iniciar processamento assíncrono
-        thread = threading.Thread(
-            target=processar_atendimento_assincrono,
-            args=(json_atendimento, codigo_inicial)
-        )
-        thread.daemon = True
-        thread.start()
+        # Gravar o envio no outbox antes de responder; a entrega é assíncrona
+        try:
+            outbox_correios.registrar(codigo_inicial, json_atendimento)
+        except OSError as e:
+            atendimentos_pendentes.transicionar_status(
+                codigo_inicial, 'Pendente', 'Erro',
+                erro=f"Falha ao gravar envio: {str(e)}"
+            )
+            raise
         
         # Retornar resposta imediata com status pendente
         resultado = {
@@ -291,14 +318,15 @@ def iniciar_atendimento():
 def consultar_status_atendimento(codigo_inicial):
     """Consulta o status de um atendimento pelo código inicial."""
     try:
-        if codigo_inicial not in atendimentos_pendentes:
+        # Cópia consistente do registro, imune a atualizações concorrentes
+        atendimento = atendimentos_pendentes.obter(codigo_inicial)
+        
+        if atendimento is None:
             return jsonify({
                 'sucesso': False,
                 'mensagem': 'Atendimento não encontrado'
             }), 404
         
-        atendimento = atendimentos_pendentes[codigo_inicial]
-        
         resultado = {
             'sucesso': True,
             'codigo_inicial': codigo_inicial,
@@ -334,8 +362,8 @@ def status_sistema():
             'status': 'Operacional',
             'total_boletos': len(df_boletos) if not df_boletos.empty else 0,
             'codigos_iniciais_gerados': len(codigos_iniciais),
-            'atendimentos_pendentes': len([a for a in atendimentos_pendentes.values() if a['status'] == 'Pendente']),
-            'atendimentos_liquidados': len([a for a in atendimentos_pendentes.values() if a['status'] == 'Liquidado']),
+            'atendimentos_pendentes': atendimentos_pendentes.contar(lambda a: a['status'] == 'Pendente'),
+            'atendimentos_liquidados': atendimentos_pendentes.contar(lambda a: a['status'] == 'Liquidado'),
             'correios_api_url': CORREIOS_API_URL,
             'timestamp': datetime.now().isoformat()
         }
@@ -371,54 +399,47 @@ def confirmar_atendimento():
                 'codigo': ''
             }), 400
         
-        # Buscar o atendimento pelo protocolo
-        atendimento_encontrado = None
-        codigo_inicial_encontrado = None
+        # Status resultante de cada código de confirmação
+        if codigo_confirmacao == "00":
+            novo_status = 'Confirmado'
+        elif codigo_confirmacao == "99":
+            novo_status = 'Não Confirmado'
+        else:
+            # Código de confirmação inválido
+            print(f"Código de confirmação inválido: {codigo_confirmacao}")
+            return jsonify({
+                'codigo': ''
+            }), 400
         
-        for codigo_inicial, atendimento in atendimentos_pendentes.items():
-            if atendimento.get('protocolo') == numero_protocolo:
-                atendimento_encontrado = atendimento
-                codigo_inicial_encontrado = codigo_inicial
-                break
+        # Buscar o atendimento pelo protocolo e aplicar a confirmação atomicamente;
+        # a confirmação dos Correios prevalece sobre o status atual
+        codigo_inicial_encontrado = atendimentos_pendentes.atualizar_onde(
+            lambda atendimento: atendimento.get('protocolo') == numero_protocolo,
+            status=novo_status,
+            data_confirmacao=datetime.now().isoformat(),
+            codigo_confirmacao=codigo_confirmacao
+        )
         
-        if not atendimento_encontrado:
+        if codigo_inicial_encontrado is None:
             print(f"Protocolo {numero_protocolo} não encontrado nos atendimentos")
             return jsonify({
                 'codigo': ''
             }), 400
         
-        # Processar a confirmação
-        if codigo_confirmacao == "00":
-            # Confirmação positiva
-            atendimentos_pendentes[codigo_inicial_encontrado]['status'] = 'Confirmado'
-            atendimentos_pendentes[codigo_inicial_encontrado]['data_confirmacao'] = datetime.now().isoformat()
-            atendimentos_pendentes[codigo_inicial_encontrado]['codigo_confirmacao'] = codigo_confirmacao
-            
+        if novo_status == 'Confirmado':
             print(f"Atendimento {numero_protocolo} confirmado com sucesso")
             
             # Retornar código de sucesso
             return jsonify({
                 'codigo': f'CONF_{numero_protocolo}_{datetime.now().strftime("%Y%m%d%H%M%S")}'
             }), 200
-            
-        elif codigo_confirmacao == "99":
-            # Confirmação negativa
-            atendimentos_pendentes[codigo_inicial_encontrado]['status'] = 'Não Confirmado'
-            atendimentos_pendentes[codigo_inicial_encontrado]['data_confirmacao'] = datetime.now().isoformat()
-            atendimentos_pendentes[codigo_inicial_encontrado]['codigo_confirmacao'] = codigo_confirmacao
-            
-            print(f"Atendimento {numero_protocolo} não confirmado")
-            
-            # Retornar código de sucesso (mesmo para confirmação negativa)
-            return jsonify({
-                'codigo': f'NCONF_{numero_protocolo}_{datetime.now().strftime("%Y%m%d%H%M%S")}'
-            }), 200
-        else:
-            # Código de confirmação inválido
-            print(f"Código de confirmação inválido: {codigo_confirmacao}")
-            return jsonify({
-                'codigo': ''
-            }), 400
+        
+        print(f"Atendimento {numero_protocolo} não confirmado")
+        
+        # Retornar código de sucesso (mesmo para confirmação negativa)
+        return jsonify({
+            'codigo': f'NCONF_{numero_protocolo}_{datetime.now().strftime("%Y%m%d%H%M%S")}'
+        }), 200
         
     except Exception as e:
         print(f"Erro na confirmação do atendimento: {e}")
@@ -1,12 +1,64 @@
-from flask import Blueprint, jsonify, request
+import json
+
+from flask import Blueprint, Response, current_app, jsonify, request, stream_with_context
 from src.models.user import User, db
 
 user_bp = Blueprint('user', __name__)
 
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+def _fetch_page(after_id, limit):
+    """Fetch one keyset page as plain dicts, selecting columns instead of ORM objects."""
+    rows = db.session.execute(
+        db.select(User.id, User.username, User.email)
+        .where(User.id > after_id)
+        .order_by(User.id)
+        .limit(limit)
+    )
+    return [{'id': row.id, 'username': row.username, 'email': row.email} for row in rows]
+
+def _stream_users(after_id, chunk_size):
+    """Yield every user after `after_id` as one JSON array, one keyset chunk at a time."""
+    yield '['
+    first = True
+    while True:
+        page = _fetch_page(after_id, chunk_size)
+        if page:
+            yield ('' if first else ',') + ','.join(json.dumps(user) for user in page)
+            first = False
+        if len(page) < chunk_size:
+            break
+        after_id = page[-1]['id']
+    yield ']'
+
 @user_bp.route('/users', methods=['GET'])
 def get_users():
-    users = User.query.all()
-    return jsonify([user.to_dict() for user in users])
+    """List users.
+
+    With `limit` and/or `after_id`, returns one keyset page plus the cursor
+    for the next one. Without them, streams the full list as a JSON array,
+    reading USERS_MAX_PAGE_SIZE rows per query.
+    """
+    max_page_size = current_app.config.get('USERS_MAX_PAGE_SIZE', MAX_PAGE_SIZE)
+
+    if 'limit' not in request.args and 'after_id' not in request.args:
+        return Response(
+            stream_with_context(_stream_users(0, max_page_size)),
+            mimetype='application/json'
+        )
+
+    try:
+        after_id = int(request.args.get('after_id', 0))
+        limit = int(request.args.get('limit', current_app.config.get('USERS_PAGE_SIZE', DEFAULT_PAGE_SIZE)))
+    except ValueError:
+        return jsonify({'error': 'after_id and limit must be integers'}), 400
+    if limit < 1 or limit > max_page_size:
+        return jsonify({'error': 'limit out of range'}), 400
+
+    users = _fetch_page(after_id, limit)
+    next_after_id = users[-1]['id'] if len(users) == limit else None
+    return jsonify({'users': users, 'next_after_id': next_after_id})
 
 @user_bp.route('/users', methods=['POST'])
 def create_user():
@@ -0,0 +1,95 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+
+from flask import Response, request
+
+try:
+    import brotli
+except ImportError:  # brotli é opcional; sem ele, apenas gzip é servido
+    brotli = None
+
+# Arquivos menores que isso não compensam a compressão
+TAMANHO_MINIMO_COMPRESSAO = 256
+
+# Os nomes dos arquivos não têm hash de conteúdo, então o cache é curto e, depois
+# dele, o navegador revalida com o ETag (304 sem corpo). O index.html é sempre revalidado
+CACHE_CONTROL_ASSETS = 'public, max-age=300'
+CACHE_CONTROL_INDEX = 'no-cache'
+
+
+class Asset:
+    """Um arquivo estático mantido em memória, com suas versões pré-comprimidas."""
+
+    def __init__(self, conteudo, mimetype, etag):
+        self.mimetype = mimetype
+        self.etag = etag
+        # codificação -> (corpo, etag da representação)
+        self.variantes = {'identity': (conteudo, etag)}
+
+        if len(conteudo) < TAMANHO_MINIMO_COMPRESSAO:
+            return
+
+        comprimido = gzip.compress(conteudo, compresslevel=9, mtime=0)
+        if len(comprimido) < len(conteudo):
+            self.variantes['gzip'] = (comprimido, f'{etag}-gz')
+
+        if brotli is not None:
+            comprimido = brotli.compress(conteudo, quality=11)
+            if len(comprimido) < len(conteudo):
+                self.variantes['br'] = (comprimido, f'{etag}-br')
+
+
+class ManifestoEstatico:
+    """Manifesto em memória da pasta de arquivos estáticos.
+
+    Todos os arquivos são lidos, comprimidos e identificados (ETag forte pelo
+    SHA-256 do conteúdo) uma única vez, na construção. As requisições são
+    atendidas só a partir da memória, sem acesso ao sistema de arquivos;
+    alterações na pasta exigem reiniciar a aplicação.
+    """
+
+    def __init__(self, pasta):
+        self.pasta = pasta
+        self.assets = {}
+
+        for raiz, _, arquivos in os.walk(pasta):
+            for nome in arquivos:
+                caminho = os.path.join(raiz, nome)
+                relativo = os.path.relpath(caminho, pasta).replace(os.sep, '/')
+                with open(caminho, 'rb') as arquivo:
+                    conteudo = arquivo.read()
+                mimetype = mimetypes.guess_type(nome)[0] or 'application/octet-stream'
+                etag = hashlib.sha256(conteudo).hexdigest()[:32]
+                self.assets[relativo] = Asset(conteudo, mimetype, etag)
+
+        print(f"Manifesto estático carregado: {len(self.assets)} arquivo(s) de {pasta}")
+
+    def servir(self, caminho):
+        """Responde com o asset do caminho, ou com o index.html (rotas do frontend)."""
+        if caminho not in self.assets:
+            caminho = 'index.html'
+        asset = self.assets.get(caminho)
+        if asset is None:
+            return "index.html not found", 404
+
+        codificacao = 'identity'
+        for candidata in ('br', 'gzip'):
+            if candidata in asset.variantes and request.accept_encodings.quality(candidata) > 0:
+                codificacao = candidata
+                break
+        corpo, etag = asset.variantes[codificacao]
+
+        # Comparação fraca (RFC 7232): proxies podem enfraquecer o ETag (W/"...")
+        if request.if_none_match.contains_weak(etag):
+            resposta = Response(status=304)
+        else:
+            resposta = Response(corpo, mimetype=asset.mimetype)
+            if codificacao != 'identity':
+                resposta.headers['Content-Encoding'] = codificacao
+
+        resposta.set_etag(etag)
+        resposta.headers['Cache-Control'] = CACHE_CONTROL_INDEX if caminho == 'index.html' else CACHE_CONTROL_ASSETS
+        resposta.vary.add('Accept-Encoding')
+        return resposta